@@ -1,11 +1,17 @@
 import os
 import logging
+from collections import namedtuple
 
 ## -- WIKINEWS SETTINGS -- ##
 WIKI_API_URL = "https://en.wikinews.org/w/api.php"
 WIKI_BASE_URL = "https://en.wikinews.org/wiki/"
 DATE_FORMAT = "%B %d, %Y"
 
+## -- HTTP SETTINGS -- ##
+# Seconds to wait for a MediaWiki API connection and for its response before
+# giving up, as a (connect, read) pair.
+REQUEST_TIMEOUT = (3, 10)
+
 ## -- TELEGRAM BOT TOKEN -- ##
 BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")
 
@@ -13,7 +19,7 @@ BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")
 LOGGING_LEVEL = logging.INFO
 
 ## -- CATEGORY MONITORING CONFIGURATION -- ##
-MONITORED_CATEGORIES = [
+_MONITORED_CATEGORIES = [
     {
         "category_name": "Published",
         "message_type": "published",
@@ -44,3 +50,16 @@ MONITORED_CATEGORIES = [
         ],
     },
 ]
+
+# Frozen once at import so the bot reads fields as attributes (e.g.
+# `cfg.category_name`). `initial_article` is optional and defaults to None.
+CategoryConfig = namedtuple(
+    'CategoryConfig',
+    'category_name message_type state_file telegram_targets initial_article',
+    defaults=(None,)
+)
+
+MONITORED_CATEGORIES = tuple(
+    CategoryConfig(**{**c, 'telegram_targets': tuple(c['telegram_targets'])})
+    for c in _MONITORED_CATEGORIES
+)
@@ -1,9 +1,23 @@
 """
 Formatters package for different message types.
+
+The formatter classes are imported on first access (PEP 562), so a run only
+loads the modules (and their dependencies, e.g. BeautifulSoup) it needs.
 """
 
-from .published import PublishedFormatter
-from .developing import DevelopingFormatter
-from .review import ReviewFormatter
+import importlib
+
+_LAZY_FORMATTERS = {
+    'PublishedFormatter': '.published',
+    'DevelopingFormatter': '.developing',
+    'ReviewFormatter': '.review',
+}
 
 __all__ = ['PublishedFormatter', 'DevelopingFormatter', 'ReviewFormatter']
+
+
+def __getattr__(name):
+    if name in _LAZY_FORMATTERS:
+        module = importlib.import_module(_LAZY_FORMATTERS[name], __name__)
+        return getattr(module, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
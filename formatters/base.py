@@ -0,0 +1,162 @@
+import logging
+import orjson
+import requests
+from datetime import datetime
+from functools import lru_cache
+from urllib.parse import quote
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import config
+
+logger = logging.getLogger(__name__)
+
+# The MediaWiki API accepts at most this many titles in one action=query request
+MAX_TITLES_PER_QUERY = 50
+
+# Static part of the API queries; call sites add the title(s). Only one end of
+# the history is needed per query, so a single revision is requested.
+LATEST_REVISION_PARAMS = {
+    "action": "query", "prop": "revisions",
+    "rvprop": "user|timestamp", "rvlimit": 1, "format": "json"
+}
+FIRST_REVISION_PARAMS = {**LATEST_REVISION_PARAMS, "rvdir": "newer"}
+
+# One pooled session shared by every formatter, so the API calls made for each
+# article reuse keep-alive connections to Wikinews instead of opening a new
+# TCP+TLS connection per request.
+SESSION = requests.Session()
+SESSION.mount('https://', HTTPAdapter(
+    pool_connections=4,
+    pool_maxsize=8,
+    # Transient server errors and rate limiting are retried too, not just
+    # connection failures; urllib3 logs every retry as a warning
+    max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=(429, 500, 502, 503, 504))
+))
+
+
+# URL templates, built once and filled in per message with str.format
+USER_URL_TPL = config.WIKI_BASE_URL + "User:{}"
+TALK_URL_TPL = config.WIKI_BASE_URL + "Talk:{}"
+INDEX_URL = config.WIKI_API_URL.replace('api.php', 'index.php')
+EDIT_URL_TPL = INDEX_URL + "?title={}&action=edit"
+HISTORY_URL_TPL = INDEX_URL + "?title={}&action=history"
+
+
+def page_slug(title):
+    """
+    Returns the URL form of a page title. Characters such as '&', '?', '#' and
+    parentheses are percent-encoded, so they can't cut a URL or a Markdown link
+    short; ':' and '/' (namespaces, subpages) are kept as they are.
+    """
+    return quote(title.replace(' ', '_'), safe=':/_')
+
+
+def user_link(user):
+    """Returns a Markdown link to a user's page."""
+    return f"[{user}]({USER_URL_TPL.format(page_slug(user))})"
+
+
+def parse_api_timestamp(timestamp):
+    """
+    Parses a MediaWiki ISO 8601 timestamp such as '2025-01-31T12:00:00Z'.
+    fromisoformat is implemented in C and much faster than strptime; before
+    Python 3.11 it doesn't accept the trailing 'Z', so it is spelled out.
+    """
+    return datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
+
+
+@lru_cache(maxsize=256)
+def _cached_get_json(api_url, params, headers):
+    """
+    GETs an API URL and decodes the JSON body. `params` and `headers` are tuples
+    of items so calls can be memoized; failures raise, so they are never cached.
+    The bot is one process per scheduled run, so the cache lasts a single run.
+    """
+    response = SESSION.get(
+        api_url, params=dict(params), headers=dict(headers), timeout=config.REQUEST_TIMEOUT
+    )
+    response.raise_for_status()
+    return orjson.loads(response.content)
+
+
+class BaseFormatter:
+    # Subclasses declare their own (possibly empty) __slots__ so no instance gets a __dict__
+    __slots__ = ('api_url', 'base_url', 'headers')
+
+    def __init__(self, api_url, base_url, headers):
+        self.api_url = api_url
+        self.base_url = base_url
+        self.headers = headers
+
+    def prefetch(self, titles):
+        """
+        Hook for fetching what several articles need in bulk, before they are
+        formatted one at a time. Does nothing unless a formatter overrides it.
+        """
+
+    def _make_api_request(self, params):
+        """Helper function to make API requests with the required User-Agent."""
+        try:
+            response = SESSION.get(
+                self.api_url, params=params, headers=self.headers, timeout=config.REQUEST_TIMEOUT
+            )
+            response.raise_for_status()
+            # orjson decodes the raw bytes directly, skipping the text decode step
+            return orjson.loads(response.content)
+        except (requests.RequestException, orjson.JSONDecodeError) as e:
+            logger.error(f"API request failed: {e}")
+            return None
+
+    def _make_cached_api_request(self, params):
+        """Like _make_api_request, but identical requests within a run are only sent once."""
+        try:
+            return _cached_get_json(
+                self.api_url, tuple(sorted(params.items())), tuple(sorted(self.headers.items()))
+            )
+        except (requests.RequestException, orjson.JSONDecodeError) as e:
+            logger.error(f"API request failed: {e}")
+            return None
+
+    def _get_single_revision(self, title, params):
+        """Returns the one revision of `title` selected by `params`, or None."""
+        data = self._make_cached_api_request({**params, "titles": title})
+        if not data or not data.get('query', {}).get('pages'):
+            return None
+
+        page_id = next(iter(data['query']['pages']))
+        revisions = data['query']['pages'][page_id].get('revisions', [])
+        return revisions[0] if revisions else None
+
+    def get_article_revision_details(self, title):
+        """Gets creator, editor, and creation time for an article."""
+        first_rev = self._get_single_revision(title, FIRST_REVISION_PARAMS)
+        if not first_rev:
+            return {}
+
+        last_rev = self._get_single_revision(title, LATEST_REVISION_PARAMS)
+        if not last_rev:
+            return {}
+
+        return {
+            'creator': first_rev.get('user'),
+            'editor': last_rev.get('user'),
+            'created_utc': first_rev.get('timestamp')
+        }
+
+    def _batch_fetch(self, titles, params):
+        """
+        Fetches several pages with a single action=query request.
+        Returns a dict mapping each requested title to its page data (pages that
+        don't exist carry a 'missing' key), or None if the request failed.
+        """
+        query_params = {"action": "query", "titles": '|'.join(titles), "format": "json"}
+        query_params.update(params)
+        data = self._make_api_request(query_params)
+        if not data or 'query' not in data or 'pages' not in data['query']:
+            return None
+
+        query = data['query']
+        # MediaWiki reports any title it had to normalize before looking it up
+        normalized = {n['from']: n['to'] for n in query.get('normalized', [])}
+        pages_by_title = {page.get('title'): page for page in query['pages'].values()}
+        return {title: pages_by_title.get(normalized.get(title, title)) for title in titles}
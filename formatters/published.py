@@ -1,28 +1,62 @@
 import logging
-import requests
 import re
-from datetime import datetime
+from itertools import islice
 from bs4 import BeautifulSoup
 from sentence_splitter import split_into_sentences, cleanup_content
 import config
+from .base import BaseFormatter, parse_api_timestamp, MAX_TITLES_PER_QUERY, TALK_URL_TPL, HISTORY_URL_TPL
 
 logger = logging.getLogger(__name__)
 
-class PublishedFormatter:
+WIKITEXT_PARAMS = {"prop": "revisions", "rvprop": "content", "rvslots": "main"}
+EXTRACT_PARAMS = {
+    "action": "query", "prop": "extracts",
+    "exintro": 1, "explaintext": 1, "exsentences": 2, "format": "json"
+}
+FIRST_SECTION_PARAMS = {"action": "parse", "prop": "text", "section": 0, "format": "json"}
+
+class PublishedFormatter(BaseFormatter):
+    __slots__ = ('_wikitext_pages',)
+
     def __init__(self, api_url, base_url, headers):
-        self.api_url = api_url
-        self.base_url = base_url
-        self.headers = headers
-
-    def _make_api_request(self, params):
-        """Helper function to make API requests with the required User-Agent."""
-        try:
-            response = requests.get(self.api_url, params=params, headers=self.headers)
-            response.raise_for_status()
-            return response.json()
-        except requests.RequestException as e:
-            logger.error(f"API request failed: {e}")
-            return None
+        super().__init__(api_url, base_url, headers)
+        # title -> (article page, talk page), shared by the review check and the summary
+        self._wikitext_pages = {}
+
+    def get_article_and_talk_pages(self, title):
+        """
+        Fetches the latest wikitext of an article and of its talk page in one request.
+        Returns an (article_page, talk_page) tuple, or None if the request failed.
+        """
+        if title not in self._wikitext_pages:
+            talk_page_title = f"Talk:{title}"
+            pages = self._batch_fetch([title, talk_page_title], WIKITEXT_PARAMS)
+            if pages is None:
+                return None
+            self._wikitext_pages[title] = (pages.get(title), pages.get(talk_page_title))
+        return self._wikitext_pages[title]
+
+    def prefetch(self, titles):
+        """
+        Fetches the article and talk page wikitext for many articles at once,
+        up to MAX_TITLES_PER_QUERY pages (half as many articles) per request.
+        Pages left out of a response (the API truncates oversized batches) aren't
+        cached, so get_article_and_talk_pages fetches them on its own later.
+        """
+        titles = [title for title in titles if title not in self._wikitext_pages]
+        per_request = MAX_TITLES_PER_QUERY // 2
+        for i in range(0, len(titles), per_request):
+            chunk = titles[i:i + per_request]
+            pages = self._batch_fetch(
+                [page_title for title in chunk for page_title in (title, f"Talk:{title}")],
+                WIKITEXT_PARAMS
+            )
+            if pages is None:
+                continue
+            for title in chunk:
+                pair = (pages.get(title), pages.get(f"Talk:{title}"))
+                if all(page and ('missing' in page or page.get('revisions')) for page in pair):
+                    self._wikitext_pages[title] = pair
 
     def check_article_review_status(self, title):
         """
@@ -32,32 +66,21 @@ class PublishedFormatter:
         talk_page_title = f"Talk:{title}"
         logger.info(f"Checking review status for talk page: {talk_page_title}")
         
-        # Get the talk page content
-        params = {
-            "action": "query",
-            "titles": talk_page_title,
-            "prop": "revisions",
-            "rvprop": "content",
-            "rvslots": "main",
-            "format": "json"
-        }
-        
-        data = self._make_api_request(params)
+        # Get the talk page content (fetched together with the article itself)
+        pages = self.get_article_and_talk_pages(title)
         
-        if not data or 'query' not in data or 'pages' not in data['query']:
+        if pages is None:
             logger.warning(f"Failed to retrieve talk page data for '{talk_page_title}'")
             return False
         
-        pages = data['query']['pages']
-        page_id = list(pages.keys())[0]
+        page_data = pages[1]
         
-        # Check if talk page exists (page_id == '-1' means page doesn't exist)
-        if page_id == '-1':
+        # Check if talk page exists
+        if not page_data or 'missing' in page_data:
             logger.warning(f"Talk page does not exist for '{title}' - False detection")
             return False
         
         # Get the talk page content
-        page_data = pages[page_id]
         if 'revisions' not in page_data or not page_data['revisions']:
             logger.warning(f"No revisions found on talk page for '{title}'")
             return False
@@ -79,151 +102,130 @@ class PublishedFormatter:
         """Extracts the first two sentences from a Wikinews article using comprehensive cleanup."""
         logger.info(f"Getting summary for article: {title}")
 
-        # METHOD 1: Extract from full wikitext content
-        wikitext_params = {
-            "action": "query", 
-            "titles": title, 
-            "prop": "revisions",
-            "rvprop": "content", 
-            "rvslots": "main", 
-            "format": "json"
-        }
-        wikitext_data = self._make_api_request(wikitext_params)
-        
-        if (wikitext_data and 'query' in wikitext_data and 'pages' in wikitext_data['query']):
-            page_id = list(wikitext_data['query']['pages'].keys())[0]
-            if page_id != '-1':
-                pages = wikitext_data['query']['pages'][page_id]
-                if 'revisions' in pages and pages['revisions']:
-                    full_wikitext = pages['revisions'][0]['slots']['main']['*']
-                    logger.debug(f"Got FULL wikitext content, length: {len(full_wikitext)}")
-                    
-                    summary = cleanup_content(full_wikitext, sentence_count=2)
-                    if summary and len(summary.strip()) > 10:
-                        logger.info(f"SUCCESS: Summary from FULL wikitext: '{summary[:150]}...'")
-                        return summary
-                    else:
-                        logger.warning(f"Wikitext cleanup produced insufficient content: '{summary}'")
-
-        # METHOD 2: Extract from full parsed HTML content
-        logger.info("Trying to get FULL parsed HTML content")
-        full_html_params = {
-            "action": "parse", 
-            "page": title, 
-            "prop": "text",
-            "format": "json"
-        }
-        full_html_data = self._make_api_request(full_html_params)
-        
-        if (full_html_data and 'parse' in full_html_data and 'text' in full_html_data['parse']):
-            raw_html = full_html_data['parse']['text']['*']
-            logger.debug(f"Got FULL HTML content, length: {len(raw_html)}")
-            
-            soup = BeautifulSoup(raw_html, 'html.parser')
-            all_text = soup.get_text()
-            logger.debug(f"Extracted all text from HTML, length: {len(all_text)}")
-            
-            sentences = split_into_sentences(all_text)
-            logger.debug(f"Split full text into {len(sentences)} sentences")
-            
-            if sentences:
-                # Filter out very short sentences to get meaningful content
-                meaningful_sentences = []
-                for i, sentence in enumerate(sentences):
-                    clean_sentence = sentence.strip()
-                    if len(clean_sentence) > 15:
-                        meaningful_sentences.append(clean_sentence)
-                        logger.debug(f"Meaningful sentence {len(meaningful_sentences)}: '{clean_sentence[:100]}...'")
-                        if len(meaningful_sentences) >= 2:
-                            break
-                
-                if meaningful_sentences:
-                    summary = ' '.join(meaningful_sentences[:2])
-                    logger.info(f"SUCCESS: Summary from FULL HTML: '{summary[:150]}...'")
-                    return summary
-        
-        # METHOD 3: Fallback to first section only
+        # Cheapest first: each method is only tried if the previous ones found nothing
+        for method in (
+            self._summary_from_wikitext,
+            self._summary_from_extract,
+            self._summary_from_first_section
+        ):
+            summary = method(title)
+            if summary:
+                return summary
+        return ""
+
+    def _summary_from_wikitext(self, title):
+        """METHOD 1: Cleans up the full wikitext (shares the request made for the review check)."""
+        pages = self.get_article_and_talk_pages(title)
+        if pages is None:
+            return None
+
+        page_data = pages[0]
+        if not page_data or 'missing' in page_data or not page_data.get('revisions'):
+            return None
+
+        full_wikitext = page_data['revisions'][0]['slots']['main']['*']
+        logger.debug("Got FULL wikitext content, length: %d", len(full_wikitext))
+
+        summary = cleanup_content(full_wikitext, sentence_count=2)
+        if summary and len(summary.strip()) > 10:
+            logger.info(f"SUCCESS: Summary from FULL wikitext: '{summary[:150]}...'")
+            return summary
+        logger.warning(f"Wikitext cleanup produced insufficient content: '{summary}'")
+        return None
+
+    def _summary_from_extract(self, title):
+        """
+        METHOD 2: Plaintext intro from the TextExtracts API, which skips
+        downloading and parsing the rendered HTML.
+        """
+        extract_data = self._make_api_request({**EXTRACT_PARAMS, "titles": title})
+        if not extract_data or not extract_data.get('query', {}).get('pages'):
+            return None
+
+        page = next(iter(extract_data['query']['pages'].values()))
+        summary = ' '.join(page.get('extract', '').split())
+        if len(summary) > 10:
+            logger.info(f"SUCCESS: Summary from text extract: '{summary[:150]}...'")
+            return summary
+        logger.warning(f"Text extract produced insufficient content: '{summary}'")
+        return None
+
+    def _summary_from_first_section(self, title):
+        """METHOD 3: Fallback to the first real paragraph of the first section only."""
         logger.info("Falling back to first section only method")
-        params = {
-            "action": "parse", "page": title, "prop": "text",
-            "section": 0, "format": "json"
-        }
-        data = self._make_api_request(params)
+        data = self._make_api_request({**FIRST_SECTION_PARAMS, "page": title})
         if not (data and 'parse' in data and 'text' in data['parse']):
             logger.error(f"Failed to get content for '{title}' - API response: {data}")
-            return ""
+            return None
 
         raw_html = data['parse']['text']['*']
-        logger.debug(f"Fallback: First section HTML length: {len(raw_html)}")
-
-        soup = BeautifulSoup(raw_html, 'html.parser')
-        paragraphs = soup.find_all('p')
-        logger.debug(f"Found {len(paragraphs)} paragraph elements")
-
-        first_paragraph = None
-        for i, p in enumerate(paragraphs):
-            text_content = p.get_text().strip()
-            logger.debug(f"Paragraph {i}: '{text_content[:100]}...' (length: {len(text_content)})")
-            
-            # Skip empty paragraphs or very short ones
-            if text_content and len(text_content) > 20:
-                first_paragraph = p
-                break
-        
+        logger.debug("Fallback: First section HTML length: %d", len(raw_html))
+
+        soup = BeautifulSoup(raw_html, 'lxml')
+        # The lead paragraph is one of the first few; don't collect the rest
+        paragraphs = soup.find_all('p', limit=5)
+
+        # Skip empty paragraphs or very short ones
+        first_paragraph = next((p for p in paragraphs if len(p.get_text().strip()) > 20), None)
+
         if not first_paragraph:
             logger.warning(f"No suitable paragraph found for '{title}'")
             # Try to get any text content as fallback
             all_text = soup.get_text().strip()
-            logger.debug(f"Fallback: Using all text content (length: {len(all_text)})")
             if all_text:
-                sentences = split_into_sentences(all_text)
+                sentences = list(islice(split_into_sentences(all_text), 2))
                 if sentences:
-                    summary = ' '.join(sentences[:2])
+                    summary = ' '.join(sentences)
                     logger.info(f"Fallback summary extracted: '{summary[:100]}...'")
                     return summary
-            return ""
-        
+            return None
+
         text = first_paragraph.get_text().strip()
-        logger.debug(f"First paragraph text: '{text[:200]}...' (full length: {len(text)})")
-        
-        sentences = split_into_sentences(text)
-        logger.debug(f"Split into {len(sentences)} sentences:")
-        for i, sentence in enumerate(sentences[:3]):
-            logger.debug(f"  Sentence {i+1}: '{sentence.strip()}'")
-        
+        sentences = list(islice(split_into_sentences(text), 2))
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"First paragraph text: '{text[:200]}...' (full length: {len(text)})")
+            for i, sentence in enumerate(sentences):
+                logger.debug(f"  Sentence {i+1}: '{sentence.strip()}'")
+
         if not sentences:
             logger.warning(f"No sentences found after splitting for '{title}'")
-            return ""
-        
-        summary = ' '.join(sentences[:2])
+            return None
+
+        summary = ' '.join(sentences)
         logger.info(f"Final summary for '{title}': '{summary[:100]}...' (full length: {len(summary)})")
         return summary
 
     def format_message(self, article_data, url_slug):
         """Creates the message for a 'Published' article."""
+        date_fmt = config.DATE_FORMAT
         title = article_data['title']
-        page_url = f"{self.base_url}{url_slug}"
+        page_url = self.base_url + url_slug
         
         summary = self.get_article_summary(title)
-        date = datetime.strptime(article_data['timestamp'], "%Y-%m-%dT%H:%M:%SZ").strftime(config.DATE_FORMAT)
+        date = parse_api_timestamp(article_data['timestamp']).strftime(date_fmt)
         
         details = {
             'title': title,
             'summary': summary,
             'date': date,
             'url': page_url,
-            'talk_page_url': f"{self.base_url}Talk:{url_slug}",
-            'history_url': f"{self.api_url.replace('api.php', 'index.php')}?title={url_slug}&action=history"
+            'talk_page_url': TALK_URL_TPL.format(url_slug),
+            'history_url': HISTORY_URL_TPL.format(url_slug)
         }
 
-        message = f"*{details['title']}*\n\n"
-        message += f"{details['date']}\n\n"
         if details['summary']:
-            message += f"{details['summary']}\n\n"
+            summary_block = f"{details['summary']}\n\n"
             logger.info(f"Added summary to message: '{details['summary'][:50]}...'")
         else:
+            summary_block = ""
             logger.warning("No summary available for message")
-        message += f"[Read more...]({details['url']})\n\n"
-        message += f"([Talk page]({details['talk_page_url']}) | [History]({details['history_url']}))"
+
+        message = (
+            f"*{details['title']}*\n\n"
+            f"{details['date']}\n\n"
+            f"{summary_block}"
+            f"[Read more...]({details['url']})\n\n"
+            f"([Talk page]({details['talk_page_url']}) | [History]({details['history_url']}))"
+        )
         
         return message
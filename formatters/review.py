@@ -1,69 +1,32 @@
 import logging
-import requests
 import re
-from datetime import datetime
 import config
+from .base import BaseFormatter, parse_api_timestamp, user_link, TALK_URL_TPL
 
 logger = logging.getLogger(__name__)
 
-class ReviewFormatter:
-    def __init__(self, api_url, base_url, headers):
-        self.api_url = api_url
-        self.base_url = base_url
-        self.headers = headers
+# Pattern to match {{peer_reviewed or {{peer reviewed (case insensitive)
+# This handles both single line and multiline templates
+PEER_REVIEW_RE = re.compile(r'\{\{\s*peer_?reviewed\s*(?:\|[^}]*)*\}\}', re.IGNORECASE | re.DOTALL)
 
-    def _make_api_request(self, params):
-        """Helper function to make API requests with the required User-Agent."""
-        try:
-            response = requests.get(self.api_url, params=params, headers=self.headers)
-            response.raise_for_status()
-            return response.json()
-        except requests.RequestException as e:
-            logger.error(f"API request failed: {e}")
-            return None
+TALK_CONTENT_PARAMS = {
+    "action": "query", "prop": "revisions",
+    "rvprop": "content", "rvslots": "main", "format": "json"
+}
 
-    def get_article_revision_details(self, title):
-        """Gets creator, editor, and creation time for an article."""
-        params = {
-            "action": "query", "titles": title, "prop": "revisions",
-            "rvprop": "user|timestamp", "rvlimit": "max", "format": "json"
-        }
-        data = self._make_api_request(params)
-        if not data or not data.get('query', {}).get('pages'):
-            return {}
-
-        page_id = list(data['query']['pages'].keys())[0]
-        revisions = data['query']['pages'][page_id].get('revisions', [])
-        if not revisions: 
-            return {}
-
-        first_rev = revisions[-1]
-        last_rev = revisions[0]
-
-        return {
-            'creator': first_rev.get('user'),
-            'editor': last_rev.get('user'),
-            'created_utc': first_rev.get('timestamp')
-        }
+class ReviewFormatter(BaseFormatter):
+    __slots__ = ()
 
     def get_talk_page_content(self, title):
         """Gets the content of the talk page for an article."""
         talk_title = f"Talk:{title}"
-        params = {
-            "action": "query", 
-            "titles": talk_title, 
-            "prop": "revisions",
-            "rvprop": "content", 
-            "rvslots": "main", 
-            "format": "json"
-        }
-        data = self._make_api_request(params)
+        data = self._make_cached_api_request({**TALK_CONTENT_PARAMS, "titles": talk_title})
         
         if not data or 'query' not in data or 'pages' not in data['query']:
             logger.warning(f"No talk page data found for {talk_title}")
             return ""
 
-        page_id = list(data['query']['pages'].keys())[0]
+        page_id = next(iter(data['query']['pages']))
         if page_id == '-1':
             logger.info(f"Talk page does not exist for {talk_title}")
             return ""
@@ -74,26 +37,25 @@ class ReviewFormatter:
             return ""
 
         content = pages['revisions'][0]['slots']['main']['*']
-        logger.debug(f"Talk page content length for {talk_title}: {len(content)}")
+        logger.debug("Talk page content length for %s: %d", talk_title, len(content))
         return content
 
     def count_peer_review_templates(self, talk_content):
         """Counts the number of peer_reviewed templates in the talk page content."""
-        if not talk_content:
+        # Cheap substring check first: most talk pages carry no template at all,
+        # and then there is no need to run the regex over the whole page.
+        if not talk_content or 'peer' not in talk_content.lower():
             return 0
 
-        # Pattern to match {{peer_reviewed or {{peer reviewed (case insensitive)
-        # This handles both single line and multiline templates
-        pattern = r'\{\{\s*peer_?reviewed\s*(?:\|[^}]*)*\}\}'
-        matches = re.findall(pattern, talk_content, re.IGNORECASE | re.DOTALL)
-        
-        count = len(matches)
+        debug = logger.isEnabledFor(logging.DEBUG)
+        count = 0
+        for count, match in enumerate(PEER_REVIEW_RE.finditer(talk_content), 1):
+            # Log the matches for debugging
+            if debug:
+                logger.debug(f"Peer review template {count}: {match.group(0)[:100]}...")
+
         logger.info(f"Found {count} peer_reviewed template(s) in talk page")
         
-        # Log the matches for debugging
-        for i, match in enumerate(matches, 1):
-            logger.debug(f"Peer review template {i}: {match[:100]}...")
-        
         return count
 
     def get_review_attempt_number(self, title):
@@ -111,11 +73,6 @@ class ReviewFormatter:
 
     def format_message(self, article_data, url_slug):
         """Creates the message for a 'Review' article."""
-        def user_link(user):
-            user_url_slug = user.replace(' ', '_')
-            user_page_url = f"https://en.wikinews.org/wiki/User:{user_url_slug}"
-            return f"[{user}]({user_page_url})"
-
         def ordinal(n):
             """Convert number to ordinal (1st, 2nd, 3rd, etc.)"""
             if 10 <= n % 100 <= 20:
@@ -125,23 +82,26 @@ class ReviewFormatter:
             return f"{n}{suffix}"
 
         title = article_data['title']
-        article_url = f"https://en.wikinews.org/wiki/{url_slug}"
+        article_url = self.base_url + url_slug
         
         # Get revision details
         rev_details = self.get_article_revision_details(title)
-        created_dt = datetime.strptime(rev_details['created_utc'], "%Y-%m-%dT%H:%M:%SZ")
+        created_dt = parse_api_timestamp(rev_details['created_utc'])
+        created_fmt = f"{config.DATE_FORMAT} %H:%M UTC"
         
         # Determine review attempt number
         attempt_number = self.get_review_attempt_number(title)
         attempt_ordinal = ordinal(attempt_number)
         
-        # Build the message
-        message = f"**[{title}]({article_url})** has been submitted for review for {attempt_ordinal} time.\n\n"
-        message += f"**Created on:** {created_dt.strftime(f'{config.DATE_FORMAT} %H:%M UTC')}\n"
-        message += f"**Created by:** {user_link(rev_details.get('creator', 'N/A'))}\n"
-        message += f"**Last edited by:** {user_link(rev_details.get('editor', 'N/A'))}\n\n"
+        talk_url = TALK_URL_TPL.format(url_slug)
         
-        talk_url = f"https://en.wikinews.org/wiki/Talk:{url_slug}"
-        message += f"([Join the discussion]({talk_url}))"
+        # Build the message
+        message = (
+            f"**[{title}]({article_url})** has been submitted for review for {attempt_ordinal} time.\n\n"
+            f"**Created on:** {created_dt.strftime(created_fmt)}\n"
+            f"**Created by:** {user_link(rev_details.get('creator', 'N/A'))}\n"
+            f"**Last edited by:** {user_link(rev_details.get('editor', 'N/A'))}\n\n"
+            f"([Join the discussion]({talk_url}))"
+        )
         
         return message
@@ -1,182 +1,305 @@
 # sentence_splitter.py
 import re
+from itertools import islice
 
-EXCEPTION_STRING = '...; Mr.; Mrs.; Dr.; Jr.; Sr.; Prof.; St.; Ave.; Corp.; Inc.; Ltd.; Co.; Gov.; Capt.; Sgt.; et al.; vs.; e.t.a.; .A.; .B.; .C.; .D.; .E.; .F.; .G.; .H.; .I.; .J.; .K.; .L.; .M.; .N.; .O.; .P.; .Q.; .R.; .S.; .T.; .U.; .V.; .W.; .X.; .Y.; .Z.;  A.;  B.;  C.;  D.;  E.;  F.;  G.;  H.;  I.;  J.;  K.;  L.;  M.;  N.;  O.;  P.;  Q.;  R.;  S.;  T.;  U.;  V.;  W.;  X.;  Y.;  Z.; .a.; .b.; .c.; .d.; .e.; .f.; .g.; .h.; .i.; .j.; .k.; .l.; .m; .n.; .o.; .p.; .q.; .r.; .s.; .t.; .u.; .v.; .w.; .x.; .y.; .z.; .a; .b; .c; .d; .e; .f; .g; .h; .i; .j; .k; .l; .m; .n; .o; .p; .q; .r; .s; .t; .u; .v; .w; .x; .y; .z; 0.0; 0.1; 0.2; 0.3; 0.4; 0.5; 0.6; 0.7; 0.8; 0.9; 1.0; 1.1; 1.2; 1.3; 1.4; 1.5; 1.6; 1.7; 1.8; 1.9; 2.0; 2.1; 2.2; 2.3; 2.4; 2.5; 2.6; 2.7; 2.8; 2.9; 3.0; 3.1; 3.2; 3.3; 3.4; 3.5; 3.6; 3.7; 3.8; 3.9; 4.0; 4.1; 4.2; 4.3; 4.4; 4.5; 4.6; 4.7; 4.8; 4.9; 5.0; 5.1; 5.2; 5.3; 5.4; 5.5; 5.6; 5.7; 5.8; 5.9; 6.0; 6.1; 6.2; 6.3; 6.4; 6.5; 6.6; 6.7; 6.8; 6.9; 7.0; 7.1; 7.2; 7.3; 7.4; 7.5; 7.6; 7.7; 7.8; 7.9; 8.0; 8.1; 8.2; 8.3; 8.4; 8.5; 8.6; 8.7; 8.8; 8.9; 9.0; 9.1; 9.2; 9.3; 9.4; 9.5; 9.6; 9.7; 9.8; 9.9. .0; .1; .2; .3; .4; .5; .6; .7; .8; .9;'
+EXCEPTION_STRING = '...; Mr.; Mrs.; Dr.; Jr.; Sr.; Prof.; St.; Ave.; Corp.; Inc.; Ltd.; Co.; Gov.; Capt.; Sgt.; et al.; vs.; e.t.a.; .A.; .B.; .C.; .D.; .E.; .F.; .G.; .H.; .I.; .J.; .K.; .L.; .M.; .N.; .O.; .P.; .Q.; .R.; .S.; .T.; .U.; .V.; .W.; .X.; .Y.; .Z.;  A.;  B.;  C.;  D.;  E.;  F.;  G.;  H.;  I.;  J.;  K.;  L.;  M.;  N.;  O.;  P.;  Q.;  R.;  S.;  T.;  U.;  V.;  W.;  X.;  Y.;  Z.; .a.; .b.; .c.; .d.; .e.; .f.; .g.; .h.; .i.; .j.; .k.; .l.; .m; .n.; .o.; .p.; .q.; .r.; .s.; .t.; .u.; .v.; .w.; .x.; .y.; .z.; .a; .b; .c; .d; .e; .f; .g; .h; .i; .j; .k; .l; .m; .n; .o; .p; .q; .r; .s; .t; .u; .v; .w; .x; .y; .z; 0.0; 0.1; 0.2; 0.3; 0.4; 0.5; 0.6; 0.7; 0.8; 0.9; 1.0; 1.1; 1.2; 1.3; 1.4; 1.5; 1.6; 1.7; 1.8; 1.9; 2.0; 2.1; 2.2; 2.3; 2.4; 2.5; 2.6; 2.7; 2.8; 2.9; 3.0; 3.1; 3.2; 3.3; 3.4; 3.5; 3.6; 3.7; 3.8; 3.9; 4.0; 4.1; 4.2; 4.3; 4.4; 4.5; 4.6; 4.7; 4.8; 4.9; 5.0; 5.1; 5.2; 5.3; 5.4; 5.5; 5.6; 5.7; 5.8; 5.9; 6.0; 6.1; 6.2; 6.3; 6.4; 6.5; 6.6; 6.7; 6.8; 6.9; 7.0; 7.1; 7.2; 7.3; 7.4; 7.5; 7.6; 7.7; 7.8; 7.9; 8.0; 8.1; 8.2; 8.3; 8.4; 8.5; 8.6; 8.7; 8.8; 8.9; 9.0; 9.1; 9.2; 9.3; 9.4; 9.5; 9.6; 9.7; 9.8; 9.9; .0; .1; .2; .3; .4; .5; .6; .7; .8; .9'
 
-PERIOD_PLACEHOLDER = 'PERIOD_PLACEHOLDER'
 EXCEPTION_STRING_SEPARATOR = '; '
-PERIOD_EXCEPTIONS = EXCEPTION_STRING.split(EXCEPTION_STRING_SEPARATOR)
-PERIOD_EXCEPTION_PLACEHOLDERS = EXCEPTION_STRING.replace('.', PERIOD_PLACEHOLDER).split(EXCEPTION_STRING_SEPARATOR)
+# Split once, dropping empty and repeated entries (dict keeps first-seen order)
+PERIOD_EXCEPTIONS = list(dict.fromkeys(
+    exception for exception in EXCEPTION_STRING.split(EXCEPTION_STRING_SEPARATOR) if exception
+))
 
-def insert_placeholders(text, period_exceptions, period_exception_placeholders):
-    modified_text = text
-    for i in range(len(period_exceptions)):
-        modified_text = modified_text.replace(period_exceptions[i], period_exception_placeholders[i])
-    return modified_text
+def _trie_pattern(words):
+    """
+    Builds a regex matching any of `words`, structured as a prefix trie so the
+    engine walks one branch per character instead of trying every word in turn.
+    Longer continuations are tried before stopping, so the longest word wins.
+    """
+    trie = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[''] = {}
 
-def remove_placeholders(text, period_exceptions, period_exception_placeholders):
-    modified_text = text
-    for i in range(len(period_exceptions)):
-        modified_text = modified_text.replace(period_exception_placeholders[i], period_exceptions[i])
-    return modified_text
+    def render(node):
+        is_word = '' in node
+        branches = [re.escape(char) + render(child) for char, child in node.items() if char]
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        if is_word:
+            return '(?:' + body + ')?'
+        return body
+
+    return render(trie)
+
+# All exceptions compiled into a single trie-shaped pattern so finding them is
+# one pass over the text. The lookahead in SCAN_RE finds the longest exception
+# starting at every position, so overlapping exceptions (e.g. ' U.' and '.S.'
+# in 'U.S.') are all masked, not just the first one consumed.
+EXCEPTION_PATTERN = _trie_pattern(PERIOD_EXCEPTIONS)
+
+# Where the periods sit inside each exception, looked up per match instead of
+# scanning the matched text
+EXCEPTION_PERIOD_OFFSETS = {
+    exception: tuple(i for i, char in enumerate(exception) if char == '.')
+    for exception in PERIOD_EXCEPTIONS
+}
+
+# The same exceptions fused with the terminator scan: a zero-width match (group
+# 1) wherever an exception starts, and a match on every '.', '!' or '?'.
+SCAN_RE = re.compile('(?=(' + EXCEPTION_PATTERN + '))|[.!?]')
+QUOTE_RE = re.compile(r'"+')
+
+def _sentence_boundaries(text):
+    """
+    Yields the (start, end) span of every run of sentence terminators in `text`,
+    skipping periods that belong to a known exception. This is a single pass of
+    SCAN_RE: an exception is always reported at its start, before the scan
+    reaches any of its periods.
+    """
+    masked = set()
+    run_start = run_end = None
+    for match in SCAN_RE.finditer(text):
+        position = match.start()
+        exception = match.group(1)
+        if exception is not None:
+            for offset in EXCEPTION_PERIOD_OFFSETS[exception]:
+                masked.add(position + offset)
+            continue
+
+        if position in masked:
+            masked.discard(position)
+            continue
+        if position == run_end:
+            run_end += 1
+            continue
+        if run_start is not None:
+            yield run_start, run_end
+        run_start, run_end = position, position + 1
+
+    if run_start is not None:
+        yield run_start, run_end
+
+def _glue_closing_quotes(sentence, next_part):
+    """
+    Moves the closing quotation mark(s) at the start of `next_part` onto the end
+    of `sentence`. Returns the (sentence, next_part) pair.
+    """
+    stripped = next_part.strip()
+    quote_match = QUOTE_RE.match(stripped)
+    if quote_match:
+        sentence += quote_match.group(0)
+        # Remove the quotation mark from the next part so it's not duplicated
+        next_part = stripped[quote_match.end():]
+    return sentence, next_part
 
 def split_into_sentences(text):
+    """
+    Yields the sentences of `text` one at a time, so callers that only need
+    the first few can stop without splitting the rest of the article.
+    """
     if not text:
-        return []
-    
-    # First, apply the placeholders for exceptions
-    modified_text = insert_placeholders(text, PERIOD_EXCEPTIONS, PERIOD_EXCEPTION_PLACEHOLDERS)
-    
-    # Split the text at sentence boundaries (., !, ?)
-    sentence_parts = re.split(r'([.!?])', modified_text)
-    sentences = []
-    
-    i = 0
-    while i < len(sentence_parts) - 1:
-        if i + 1 < len(sentence_parts):
-            # Join the text part with its punctuation
-            sentence = sentence_parts[i] + sentence_parts[i + 1]
-            
-            # Check if next part starts with a closing quotation mark
-            if i + 2 < len(sentence_parts) and sentence_parts[i + 2].strip().startswith('"'):
-                # Extract just the quotation mark and add it to this sentence
-                next_part = sentence_parts[i + 2].strip()
-                quote_match = re.match(r'^"+', next_part)
-                if quote_match:
-                    sentence += quote_match.group(0)
-                    # Remove the quotation mark from the next part so it's not duplicated
-                    sentence_parts[i + 2] = next_part[len(quote_match.group(0)):]
-            
-            # Restore original periods/exceptions
-            sentence = remove_placeholders(sentence, PERIOD_EXCEPTIONS, PERIOD_EXCEPTION_PLACEHOLDERS)
-            sentences.append(sentence)
-        
-        i += 2
-    
+        return
+
+    # Find sentence boundaries (., !, ?), skipping exception periods
+    sentence = None
+    last = 0
+    for run_start, run_end in _sentence_boundaries(text):
+        part = text[last:run_start]
+        if sentence is not None:
+            # Check if this part starts with a closing quotation mark
+            sentence, part = _glue_closing_quotes(sentence, part)
+            yield sentence
+        # Join the text part with its punctuation
+        sentence = part + text[run_start:run_end]
+        last = run_end
+
+    last_part = text[last:]
+    if sentence is not None:
+        sentence, last_part = _glue_closing_quotes(sentence, last_part)
+        yield sentence
+
     # Handle the last part if it exists (for text not ending in punctuation)
-    if len(sentence_parts) % 2 == 1:
-        last_part = sentence_parts[-1].strip()
-        if len(last_part) > 0:
-            last_part = remove_placeholders(last_part, PERIOD_EXCEPTIONS, PERIOD_EXCEPTION_PLACEHOLDERS)
-            sentences.append(last_part)
-    
-    return sentences
+    last_part = last_part.strip()
+    if len(last_part) > 0:
+        yield last_part
+
+# Wikitext cleanup patterns, compiled once at import instead of going through
+# the re module's cache on every call. A run of a negated class is greedy
+# wherever that matches the same text as a lazy one (the class can't consume
+# the terminator), so the engine doesn't retry the rest of the pattern once
+# per character.
+COMMENT_RE = re.compile(r'<!--[\s\S]*?-->')
+NOTICE_TEMPLATE_RE = re.compile(
+    r'\{\{(?:Ombox|[Aa]mbox|[Mm]box|[Nn]otice|[Mm]essage)[^}]*?\|\s*text\s*=\s*([^}\|]+)[^}]*\}\}'
+)
+W_TEMPLATE_RE = re.compile(
+    r'\{\{[Ww]\|((?:[^|{}]|\{\{[^{}]*\}\})*?)(?:\|((?:[^|{}]|\{\{[^{}]*\}\})*?))?\}\}'
+)
+MEDIA_LINK_RE = re.compile(r'\[\[(?:File|Image|Media):[^\[\]]*\]\]', re.IGNORECASE)
+MEDIA_LINK_START_RE = re.compile(r'\[\[(?:File|Image|Media):', re.IGNORECASE)
+LINK_BRACKET_RE = re.compile(r'\[\[|\]\]')
+TEMPLATE_BRACE_RE = re.compile(r'\{\{|\}\}')
+CATEGORY_RE = re.compile(r'\[\[(?:Category):[\s\S]*?\]\]', re.IGNORECASE)
+BOLD_ITALIC_RE = re.compile(r"'''''(.+?)'''''")
+BOLD_RE = re.compile(r"'''(.+?)'''")
+ITALIC_RE = re.compile(r"''(.+?)''")
+QUOTE_MARKS_RE = re.compile(r'[«»‹›『』「」]')
+PIPED_LINK_RE = re.compile(r'\[\[(?:[^|\]]*\|)?([^\]]+)\]\]')
+EXTERNAL_LINK_RE = re.compile(r'\[(?:https?|ftp|gopher|irc)://[^\]\s]*(?:\s+([^\]]+))?\]')
+REF_RE = re.compile(r'<ref[^>]*>[\s\S]*?</ref>')
+SELF_CLOSING_REF_RE = re.compile(r'<ref[^>/]*/>')
+HTML_TAG_RE = re.compile(r'<[^>]+>')
+TABLE_RE = re.compile(r'\{\|[\s\S]*?\|\}')
+ENTITY_RE = re.compile(r'&[a-z]+;')
+HEADER_RE = re.compile(r'==+\s*[^=]+\s*==+')
 
 def remove_comments(text):
     """Remove HTML comments"""
-    return re.sub(r'<!--[\s\S]*?-->', '', text)
+    if '<!--' not in text:
+        return text
+    return COMMENT_RE.sub('', text)
 
 def remove_notice_templates(text):
     """Remove notice templates"""
-    return re.sub(
-        r'\{\{(?:Ombox|[Aa]mbox|[Mm]box|[Nn]otice|[Mm]essage)[^}]*?\|\s*text\s*=\s*([^}\|]+)(?:[^}]*?)\}\}',
-        r'\1',
-        text
-    )
+    if '{{' not in text:
+        return text
+    return NOTICE_TEMPLATE_RE.sub(r'\1', text)
 
 def fix_wikilinks(text):
     """Fix W| template wikilinks"""
+    if '{{' not in text:
+        return text
     def replace_w_template(match):
         p1 = match.group(1)
         p2 = match.group(2) if match.group(2) else None
         return f"[[{p2}]]" if p2 else f"[[{p1}]]"
     
-    return re.sub(
-        r'\{\{[Ww]\|((?:[^|{}]|\{\{[^{}]*\}\})*?)(?:\|((?:[^|{}]|\{\{[^{}]*\}\})*?))?\}\}',
-        replace_w_template,
-        text
-    )
+    return W_TEMPLATE_RE.sub(replace_w_template, text)
 
 def remove_media_links(text):
     """Remove media links with proper bracket matching"""
+    if '[[' not in text:
+        return text
     # Simple media links first
-    cleaned_text = re.sub(r'\[\[(?:File|Image|Media):[^\[\]]*?\]\]', '', text, flags=re.IGNORECASE)
+    cleaned_text = MEDIA_LINK_RE.sub('', text)
     
-    # Handle nested brackets
-    while re.search(r'\[\[(?:File|Image|Media):', cleaned_text, re.IGNORECASE):
-        start_match = re.search(r'\[\[(?:File|Image|Media):', cleaned_text, re.IGNORECASE)
+    # Handle nested brackets, resuming each search where the last link ended
+    parts = []
+    last = 0
+    while True:
+        start_match = MEDIA_LINK_START_RE.search(cleaned_text, last)
         if not start_match:
             break
         
         start_index = start_match.start()
         depth = 1
-        end_index = start_index + 2
-        
-        while depth > 0 and end_index < len(cleaned_text) - 1:
-            if cleaned_text[end_index:end_index + 2] == '[[':
-                depth += 1
-                end_index += 2
-            elif cleaned_text[end_index:end_index + 2] == ']]':
-                depth -= 1
-                end_index += 2
-            else:
-                end_index += 1
+        end_index = None
+        for bracket in LINK_BRACKET_RE.finditer(cleaned_text, start_index + 2):
+            depth += 1 if bracket.group(0) == '[[' else -1
+            if depth == 0:
+                end_index = bracket.end()
+                break
         
-        if depth == 0:
-            cleaned_text = cleaned_text[:start_index] + cleaned_text[end_index:]
-        else:
-            break  # Avoid infinite loop if brackets don't match
+        if end_index is None:
+            break  # Brackets don't match; leave the rest as it is
+        parts.append(cleaned_text[last:start_index])
+        last = end_index
     
-    return cleaned_text
+    parts.append(cleaned_text[last:])
+    return ''.join(parts)
 
 def remove_templates(text):
     """Remove templates with proper bracket matching"""
-    # Simple template removal pattern
-    strip_templates = re.compile(r'\{\{[^\}\{]*(?:\{\{[^\}\{]*(?:\{\{[^\}\{]*(?:\{\{[^\}\{]*\}\})?\}\})?\}\})?\}\}')
-    while re.search(r'\{\{[^\}]*\}\}', text):
-        text = strip_templates.sub('', text)
-    return text
+    if '{{' not in text:
+        return text
+    # One scan over the braces: '}}' closes the innermost open '{{', and each
+    # closed template replaces any spans already removed inside it
+    opened = []
+    removed = []
+    for brace in TEMPLATE_BRACE_RE.finditer(text):
+        if brace.group(0) == '{{':
+            opened.append(brace.start())
+        elif opened:
+            start = opened.pop()
+            while removed and removed[-1][0] > start:
+                removed.pop()
+            removed.append((start, brace.end()))
+    
+    parts = []
+    last = 0
+    for start, end in removed:
+        parts.append(text[last:start])
+        last = end
+    parts.append(text[last:])
+    return ''.join(parts)
 
 def remove_categories(text):
     """Remove category links"""
-    return re.sub(r'\[\[(?:Category):[\s\S]*?\]\]', '', text, flags=re.IGNORECASE)
+    if '[[' not in text:
+        return text
+    return CATEGORY_RE.sub('', text)
 
 def clean_formatting(text):
     """Remove wiki formatting"""
-    text = re.sub(r"'''''(.+?)'''''", r'\1', text)  # Bold italic
-    text = re.sub(r"'''(.+?)'''", r'\1', text)      # Bold
-    text = re.sub(r"''(.+?)''", r'\1', text)        # Italic
-    text = re.sub(r'[«»‹›『』「」]', '', text)        # Quote marks
+    if "''" in text:
+        text = BOLD_ITALIC_RE.sub(r'\1', text)  # Bold italic
+        text = BOLD_RE.sub(r'\1', text)         # Bold
+        text = ITALIC_RE.sub(r'\1', text)       # Italic
+    text = QUOTE_MARKS_RE.sub('', text)     # Quote marks
     return text
 
 def handle_links(text):
     """Handle wiki links and external links"""
+    if '[' not in text:
+        return text
     # Handle piped links [[link|display]] -> display
-    piped_link = re.compile(r'\[\[(?:[^|\]]*\|)?([^\]]+)\]\]')
-    while re.search(r'\[\[', text):
-        text = piped_link.sub(r'\1', text)
+    # (repeated until nothing changes, so nested links unwrap from the inside)
+    while True:
+        text, count = PIPED_LINK_RE.subn(r'\1', text)
+        if not count:
+            break
     
     # Handle external links [url display] -> display
-    text = re.sub(r'\[(?:https?|ftp|gopher|irc)://[^\]\s]*(?:\s+([^\]]+))?\]', r'\1 ', text)
+    text = EXTERNAL_LINK_RE.sub(r'\1 ', text)
     return text
 
 def remove_html_and_tables(text):
     """Remove HTML tags, references, and tables"""
-    text = re.sub(r'<ref[^>]*?>[\s\S]*?</ref>', '', text)  # References with content
-    text = re.sub(r'<ref[^>\/]*?/>', '', text)             # Self-closing references
-    text = re.sub(r'<[^>]+>', '', text)                    # All HTML tags
-    text = re.sub(r'\{\|[\s\S]*?\|\}', '', text)          # Tables
+    if '<' in text:
+        text = REF_RE.sub('', text)              # References with content
+        text = SELF_CLOSING_REF_RE.sub('', text) # Self-closing references
+        text = HTML_TAG_RE.sub('', text)         # All HTML tags
+    if '{|' in text:
+        text = TABLE_RE.sub('', text)            # Tables
     return text
 
 def clean_whitespace(text):
     """Clean up whitespace and entities"""
-    text = re.sub(r'(\r\n|\n|\r)', ' ', text)     # Line breaks to spaces
-    text = re.sub(r'&nbsp;', ' ', text)           # Non-breaking spaces
-    text = re.sub(r'&[a-z]+;', '', text)          # HTML entities
-    text = re.sub(r'\s+', ' ', text)              # Multiple spaces to single
-    return text.strip()
+    text = text.replace('&nbsp;', ' ')      # Non-breaking spaces
+    if '&' in text:
+        text = ENTITY_RE.sub('', text)      # HTML entities
+    # Line breaks and runs of whitespace to single spaces, trimmed: str.split
+    # treats the same characters as whitespace as the regex \s does
+    return ' '.join(text.split())
 
 def remove_headers(text):
     """Remove section headers"""
-    return re.sub(r'==+\s*[^=]+\s*==+', '', text)
+    if '==' not in text:
+        return text
+    return HEADER_RE.sub('', text)
 
 def cleanup_content(content, sentence_count=2):
-    if not content:
+    if not content or sentence_count == 0:
         return ''
     
     clean_text = content
     
-    # Apply all cleaning steps in order
+    # Apply all cleaning steps in order. Each one returns straight away when
+    # the text has none of the markup it handles.
     clean_text = remove_comments(clean_text)
     clean_text = remove_notice_templates(clean_text)
     clean_text = fix_wikilinks(clean_text)
@@ -189,9 +312,7 @@ def cleanup_content(content, sentence_count=2):
     clean_text = clean_whitespace(clean_text)
     clean_text = remove_headers(clean_text)
     
-    # Split into sentences and filter
-    sentences = split_into_sentences(clean_text)
-    sentences = [s.strip() for s in sentences if 0 < len(s) < 500]
-    sentences = sentences[:sentence_count]
+    # Split into sentences and filter, stopping once we have enough
+    sentences = (s.strip() for s in split_into_sentences(clean_text) if 0 < len(s) < 500)
     
-    return ' '.join(sentences).strip()
+    return ' '.join(islice(sentences, sentence_count)).strip()
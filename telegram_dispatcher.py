@@ -0,0 +1,83 @@
+# telegram_dispatcher.py
+
+import asyncio
+import logging
+from collections import deque
+from telegram.error import TelegramError
+
+logger = logging.getLogger(__name__)
+
+# Telegram lets a bot send roughly 30 messages per second across all chats;
+# going faster gets requests rejected with 429 Too Many Requests.
+MAX_MESSAGES_PER_SECOND = 30
+# In a single group the limit is 20 messages per minute. Topics (threads) of
+# a forum group share their group's limit.
+MAX_MESSAGES_PER_CHAT_PER_MINUTE = 20
+
+
+class RateLimiter:
+    """Allows at most `rate` acquisitions in any `period`-second window."""
+
+    def __init__(self, rate, period=1.0):
+        self.rate = rate
+        self.period = period
+        self._sent = deque()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        """Waits until another send fits in the window, then records it."""
+        async with self._lock:
+            loop = asyncio.get_running_loop()
+            while True:
+                now = loop.time()
+                while self._sent and now - self._sent[0] >= self.period:
+                    self._sent.popleft()
+                if len(self._sent) < self.rate:
+                    break
+                await asyncio.sleep(self.period - (now - self._sent[0]))
+            self._sent.append(loop.time())
+
+
+# Shared by every broadcast in the run, whichever category it comes from
+global_limiter = RateLimiter(MAX_MESSAGES_PER_SECOND)
+# chat_id -> RateLimiter, created on the first send to that chat
+chat_limiters = {}
+
+
+async def acquire_send_slot(chat_id):
+    """Waits until a message may be sent to `chat_id` under both limits."""
+    # The per-chat wait can be long, so it comes first: a send held back
+    # for its chat doesn't take up a slot in the global window meanwhile
+    if chat_id not in chat_limiters:
+        chat_limiters[chat_id] = RateLimiter(MAX_MESSAGES_PER_CHAT_PER_MINUTE, 60.0)
+    await chat_limiters[chat_id].acquire()
+    await global_limiter.acquire()
+
+
+async def send_to_target(bot, message, target):
+    """Sends one formatted message to a single Telegram target."""
+    await acquire_send_slot(target['chat_id'])
+    try:
+        await bot.send_message(
+            chat_id=target['chat_id'],
+            message_thread_id=target.get('thread_id'),
+            text=message,
+            parse_mode='Markdown',
+            disable_web_page_preview=True
+        )
+        logger.info(f"Successfully sent message to target: {target}")
+    except TelegramError as e:
+        logger.error(f"Failed to send message to {target}: {e}")
+
+
+async def broadcast_message(bot, message, targets):
+    """Sends a formatted message to a list of Telegram targets concurrently."""
+    results = await asyncio.gather(
+        *(send_to_target(bot, message, target) for target in targets),
+        return_exceptions=True
+    )
+    # Telegram errors are handled per target; anything else is logged here so
+    # one failing send doesn't abort delivery to the rest
+    for target, result in zip(targets, results):
+        if isinstance(result, Exception):
+            logger.error(f"Unexpected error sending message to {target}: {result}")
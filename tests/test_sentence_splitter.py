@@ -0,0 +1,34 @@
+import unittest
+
+from sentence_splitter import remove_templates
+
+
+class RemoveTemplatesTest(unittest.TestCase):
+    """Pins remove_templates' output, including markup the old regex loop got wrong."""
+
+    def test_removes_simple_and_nested_templates(self):
+        self.assertEqual(remove_templates('x {{a}} y {{b {{c|d}} e}} z'), 'x  y  z')
+
+    def test_text_without_templates_is_unchanged(self):
+        self.assertEqual(remove_templates('no templates here'), 'no templates here')
+
+    def test_unclosed_template_is_left_in_place(self):
+        self.assertEqual(remove_templates('p {{a} q'), 'p {{a} q')
+
+    def test_triple_brace_parameter_leaves_one_closing_brace(self):
+        # The first '{{' pairs with the first '}}', so the third '}' is left over
+        # (the old loop left '{}' instead)
+        self.assertEqual(remove_templates('a {{{param}}} b'), 'a } b')
+        self.assertEqual(remove_templates('{{a|{{{1}}}}} after'), '} after')
+
+    def test_template_with_lone_closing_brace_is_removed(self):
+        # The old loop left this template in place
+        self.assertEqual(remove_templates('x {{a}b}} y'), 'x  y')
+
+    def test_template_with_lone_opening_brace_is_removed(self):
+        # The old loop never terminated on this input
+        self.assertEqual(remove_templates('x {{a{b}} y'), 'x  y')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,102 @@
+import asyncio
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import orjson
+
+import wikinews_bot
+from config import CategoryConfig
+from formatters import PublishedFormatter
+
+PUBLISHED = CategoryConfig(
+    category_name='Published',
+    message_type='published',
+    state_file='published_state.json',
+    telegram_targets=[{'chat_id': '1', 'thread_id': '2'}],
+)
+
+# Category members, oldest first
+MEMBERS = [
+    {'title': 'Old article', 'timestamp': '2025-01-01T10:00:00Z'},
+    {'title': 'Last checked article', 'timestamp': '2025-01-02T10:00:00Z'},
+]
+UNREVIEWED = {'title': 'Unreviewed article', 'timestamp': '2025-01-03T10:00:00Z'}
+
+
+class PublishedCategoryTest(unittest.TestCase):
+    """Runs process_category for Published against a fake category API."""
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.state_path = os.path.join(tmp.name, PUBLISHED.state_file)
+        self.members = list(MEMBERS)
+        # Everything already in the category passed review
+        self.reviewed = {m['title'] for m in MEMBERS}
+        self.broadcast = mock.AsyncMock()
+
+        wikinews_bot._formatter_cache.clear()
+        self.addCleanup(wikinews_bot._formatter_cache.clear)
+        for patcher in (
+            mock.patch.object(wikinews_bot, 'STATE_DIR', tmp.name),
+            mock.patch.object(wikinews_bot, 'broadcast_message', self.broadcast),
+            mock.patch.object(wikinews_bot.WikinewsBot, '_make_api_request', self._category_api),
+            mock.patch.object(PublishedFormatter, 'prefetch', lambda self, titles: None),
+            mock.patch.object(PublishedFormatter, 'check_article_review_status',
+                              lambda _, title: title in self.reviewed),
+            mock.patch.object(PublishedFormatter, 'format_message',
+                              lambda self, article_data, url_slug: f"New: {article_data['title']}"),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        self._write_state(MEMBERS[-1])
+
+    def _category_api(self, params):
+        # Like the API, cmstart is inclusive and cmdir=asc returns oldest first
+        members = [m for m in self.members if m['timestamp'] >= params.get('cmstart', '')]
+        if params.get('cmdir') != 'asc':
+            members.reverse()
+        return {'query': {'categorymembers': members}}
+
+    def _write_state(self, article):
+        with open(self.state_path, 'wb') as f:
+            f.write(orjson.dumps(article, option=orjson.OPT_INDENT_2))
+
+    def _read_state(self):
+        with open(self.state_path, 'rb') as f:
+            return orjson.loads(f.read())
+
+    def _run(self):
+        asyncio.run(wikinews_bot.process_category(None, PUBLISHED))
+
+    def test_unchanged_category_sends_nothing(self):
+        self._run()
+        self._run()
+
+        self.broadcast.assert_not_awaited()
+        self.assertEqual(self._read_state(), MEMBERS[-1])
+
+    def test_new_article_is_sent_once_and_saved(self):
+        self.members.append(UNREVIEWED)
+        self.reviewed.add(UNREVIEWED['title'])
+        self._run()
+        self._run()
+
+        self.broadcast.assert_awaited_once()
+        self.assertEqual(self._read_state(), UNREVIEWED)
+
+    def test_skipped_article_is_not_sent_or_saved(self):
+        # A false detection: in the category, but without a passed review
+        self.members.append(UNREVIEWED)
+        self._run()
+        self._run()
+
+        self.broadcast.assert_not_awaited()
+        self.assertEqual(self._read_state(), MEMBERS[-1])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,17 +1,18 @@
 # wikinews_bot.py
 
 import requests
+import orjson
 import logging
-import json
 import os
 import sys
 import asyncio
-from datetime import datetime
 from telegram import Bot
-from telegram.error import TelegramError
+from telegram.request import HTTPXRequest
 
 import config
-from formatters import PublishedFormatter, DevelopingFormatter, ReviewFormatter
+import formatters
+from formatters.base import SESSION, page_slug
+from telegram_dispatcher import broadcast_message
 
 logging.basicConfig(
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
@@ -23,6 +24,34 @@ logger = logging.getLogger(__name__)
 # Prevents the set from growing unboundedly over time.
 MAX_NOTIFIED_HISTORY = 200
 
+# Upper bound on articles being fetched/formatted at the same time, so a
+# catch-up run doesn't flood the MediaWiki API.
+MAX_CONCURRENT_FETCHES = 8
+
+# Connections the Telegram client may keep open. The library default is one,
+# which would queue the concurrent sends of a broadcast behind each other.
+TELEGRAM_CONNECTION_POOL_SIZE = 8
+
+# Static part of the category members query; the category is added per bot
+CATEGORY_MEMBERS_PARAMS = {
+    "action": "query", "list": "categorymembers",
+    "cmlimit": 50, "cmsort": "timestamp", "cmdir": "desc", "format": "json",
+    "cmprop": "title|timestamp"
+}
+
+# State files live in the checkout the workflow commits from, or next to this script
+STATE_DIR = os.environ.get('GITHUB_WORKSPACE') or os.path.dirname(os.path.abspath(__file__))
+
+# Formatter class (in the formatters package) for each message type
+FORMATTER_CLASS_NAMES = {
+    'published': 'PublishedFormatter',
+    'developing': 'DevelopingFormatter',
+    'review': 'ReviewFormatter',
+}
+
+# One formatter per (message type, wiki), shared by all categories using it
+_formatter_cache = {}
+
 
 class WikinewsBot:
     """A bot to monitor a specific Wikinews category based on a given configuration."""
@@ -32,33 +61,38 @@ class WikinewsBot:
         self.api_url = config.WIKI_API_URL
         self.base_url = config.WIKI_BASE_URL
         self.state_file_path = self._get_state_file_path()
+        # Raw bytes of the state file as last read or written, to skip no-op rewrites
+        self._saved_state = None
+        # Category members as fetched by the last check_for_new_articles call
+        self.category_members = []
 
         self.headers = {
             'User-Agent': 'WikinewsTelegramBot/1.1 (https://github.com/Baibaswata2/en-wikinews-bot; baibaswataray@gmail.com)'
         }
 
         # --- State loading (strategy differs by message type) ---
-        msg_type = category_config['message_type']
+        msg_type = category_config.message_type
 
         if msg_type in ('developing', 'review'):
             # These categories use a notified-set strategy to avoid duplicate
             # notifications when a newer article is removed from the category.
+            # Kept as a dict used as an ordered set: oldest notification first.
             self.notified_titles = self._load_notified_titles()
             self.last_checked_article_title = None   # not used for these types
+            self.last_checked_timestamp = None
         else:
             # 'published' keeps the original single-title / timestamp strategy.
             self.notified_titles = None
-            self.last_checked_article_title = self._load_last_checked_article_title()
-
-        # Initialize appropriate formatter
-        if msg_type == 'published':
-            self.formatter = PublishedFormatter(self.api_url, self.base_url, self.headers)
-        elif msg_type == 'developing':
-            self.formatter = DevelopingFormatter(self.api_url, self.base_url, self.headers)
-        elif msg_type == 'review':
-            self.formatter = ReviewFormatter(self.api_url, self.base_url, self.headers)
-        else:
+            self.last_checked_article_title, self.last_checked_timestamp = self._load_last_checked_article()
+
+        # Initialize appropriate formatter, reusing one already made for this type
+        if msg_type not in FORMATTER_CLASS_NAMES:
             raise ValueError(f"Unknown message type: {msg_type}")
+        key = (msg_type, self.api_url, self.base_url)
+        if key not in _formatter_cache:
+            formatter_class = getattr(formatters, FORMATTER_CLASS_NAMES[msg_type])
+            _formatter_cache[key] = formatter_class(self.api_url, self.base_url, self.headers)
+        self.formatter = _formatter_cache[key]
 
     # ------------------------------------------------------------------
     # Path helpers
@@ -66,32 +100,35 @@ class WikinewsBot:
 
     def _get_state_file_path(self):
         """Determines the correct path for the state file."""
-        if os.environ.get('GITHUB_WORKSPACE'):
-            return os.path.join(os.environ.get('GITHUB_WORKSPACE'), self.config['state_file'])
-        return os.path.join(os.path.dirname(os.path.abspath(__file__)), self.config['state_file'])
+        return os.path.join(STATE_DIR, self.config.state_file)
 
     # ------------------------------------------------------------------
     # State loading
     # ------------------------------------------------------------------
 
-    def _load_last_checked_article_title(self):
-        """(Published) Loads the last checked article title from the state file."""
+    def _load_last_checked_article(self):
+        """
+        (Published) Loads the last checked article from the state file.
+        Returns a (title, timestamp) tuple; the timestamp is None if unknown.
+        """
         try:
             if os.path.exists(self.state_file_path):
-                with open(self.state_file_path, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
+                with open(self.state_file_path, 'rb') as f:
+                    self._saved_state = f.read()
+                    data = orjson.loads(self._saved_state)
                     title = data.get('title')
-                    logger.info(f"[{self.config['category_name']}] Loaded last checked article: {title}")
-                    return title
+                    logger.info(f"[{self.config.category_name}] Loaded last checked article: {title}")
+                    return title, data.get('timestamp')
         except Exception as e:
-            logger.error(f"[{self.config['category_name']}] Error loading state file: {e}")
+            logger.error(f"[{self.config.category_name}] Error loading state file: {e}")
 
-        logger.warning(f"[{self.config['category_name']}] State file not found. Using initial article.")
-        return self.config['initial_article']
+        logger.warning(f"[{self.config.category_name}] State file not found. Using initial article.")
+        return self.config.initial_article, None
 
     def _load_notified_titles(self):
         """
-        (Developing / Review) Loads the set of already-notified article titles.
+        (Developing / Review) Loads the already-notified article titles, in
+        notification order, as a dict with the titles as keys.
 
         Supports two state-file formats:
           - New format: {"notified_titles": ["Title A", "Title B", ...]}
@@ -99,61 +136,81 @@ class WikinewsBot:
         """
         try:
             if os.path.exists(self.state_file_path):
-                with open(self.state_file_path, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
+                with open(self.state_file_path, 'rb') as f:
+                    self._saved_state = f.read()
+                    data = orjson.loads(self._saved_state)
 
                 # New format
                 if 'notified_titles' in data:
-                    titles = set(data['notified_titles'])
+                    titles = dict.fromkeys(data['notified_titles'])
                     logger.info(
-                        f"[{self.config['category_name']}] Loaded {len(titles)} notified title(s)."
+                        f"[{self.config.category_name}] Loaded {len(titles)} notified title(s)."
                     )
                     return titles
 
                 # Old format — migrate on the fly
                 if 'title' in data and data['title']:
                     logger.info(
-                        f"[{self.config['category_name']}] Migrating old state format. "
+                        f"[{self.config.category_name}] Migrating old state format. "
                         f"Seeding notified set with: {data['title']}"
                     )
-                    return {data['title']}
+                    return {data['title']: None}
 
         except Exception as e:
-            logger.error(f"[{self.config['category_name']}] Error loading state file: {e}")
+            logger.error(f"[{self.config.category_name}] Error loading state file: {e}")
 
         # No usable state file — seed from config if available
-        initial = self.config.get('initial_article')
+        initial = self.config.initial_article
         if initial:
             logger.warning(
-                f"[{self.config['category_name']}] State file not found. "
+                f"[{self.config.category_name}] State file not found. "
                 f"Seeding notified set with initial_article: {initial}"
             )
-            return {initial}
+            return {initial: None}
 
         logger.warning(
-            f"[{self.config['category_name']}] No state file and no initial_article. "
+            f"[{self.config.category_name}] No state file and no initial_article. "
             f"Starting with empty notified set."
         )
-        return set()
+        return {}
 
     # ------------------------------------------------------------------
     # State saving
     # ------------------------------------------------------------------
 
+    def _write_state(self, state):
+        """
+        Writes the state file atomically: the new content goes to a temporary
+        file first and replaces the old file only once it's fully on disk, so a
+        crash mid-write can't leave a truncated state file behind.
+        Returns False, without touching the file, if the content is unchanged.
+        """
+        payload = orjson.dumps(state, option=orjson.OPT_INDENT_2)
+        if payload == self._saved_state:
+            logger.info(f"[{self.config.category_name}] State unchanged; not rewriting the state file.")
+            return False
+
+        tmp_path = self.state_file_path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.state_file_path)
+        self._saved_state = payload
+        return True
+
     def save_last_checked_article(self, article_data):
         """(Published) Saves the latest article data to the state file."""
         try:
-            with open(self.state_file_path, 'w', encoding='utf-8') as f:
-                state_to_save = {
-                    'title': article_data.get('title'),
-                    'timestamp': article_data.get('timestamp')
-                }
-                json.dump(state_to_save, f, ensure_ascii=False, indent=4)
-            logger.info(
-                f"[{self.config['category_name']}] Saved last checked article: {article_data.get('title')}"
-            )
+            if self._write_state({
+                'title': article_data.get('title'),
+                'timestamp': article_data.get('timestamp')
+            }):
+                logger.info(
+                    f"[{self.config.category_name}] Saved last checked article: {article_data.get('title')}"
+                )
         except Exception as e:
-            logger.error(f"[{self.config['category_name']}] Error saving state file: {e}")
+            logger.error(f"[{self.config.category_name}] Error saving state file: {e}")
 
     def save_notified_titles(self, current_category_titles):
         """
@@ -167,24 +224,28 @@ class WikinewsBot:
         """
         current_set = set(current_category_titles)
 
-        # Split notified titles into "still in category" and "already left"
-        still_in = [t for t in self.notified_titles if t in current_set]
-        already_left = [t for t in self.notified_titles if t not in current_set]
+        # Split notified titles into "still in category" and "already left",
+        # both oldest notification first
+        still_in, already_left = [], []
+        for t in self.notified_titles:
+            (still_in if t in current_set else already_left).append(t)
 
         # Keep only the tail of the historical list to cap growth
         pruned_left = already_left[-MAX_NOTIFIED_HISTORY:]
+        dropped = set(already_left[:len(already_left) - len(pruned_left)])
 
-        final_list = still_in + pruned_left
+        # Saved in notification order so the next run still knows which
+        # historical titles are the most recent
+        final_list = [t for t in self.notified_titles if t not in dropped]
 
         try:
-            with open(self.state_file_path, 'w', encoding='utf-8') as f:
-                json.dump({'notified_titles': final_list}, f, ensure_ascii=False, indent=4)
-            logger.info(
-                f"[{self.config['category_name']}] Saved notified set: "
-                f"{len(still_in)} in-category + {len(pruned_left)} historical = {len(final_list)} total."
-            )
+            if self._write_state({'notified_titles': final_list}):
+                logger.info(
+                    f"[{self.config.category_name}] Saved notified set: "
+                    f"{len(still_in)} in-category + {len(pruned_left)} historical = {len(final_list)} total."
+                )
         except Exception as e:
-            logger.error(f"[{self.config['category_name']}] Error saving state file: {e}")
+            logger.error(f"[{self.config.category_name}] Error saving state file: {e}")
 
     # ------------------------------------------------------------------
     # API helpers
@@ -193,21 +254,24 @@ class WikinewsBot:
     def _make_api_request(self, params):
         """Helper function to make API requests with the required User-Agent."""
         try:
-            response = requests.get(self.api_url, params=params, headers=self.headers)
+            response = SESSION.get(
+                self.api_url, params=params, headers=self.headers, timeout=config.REQUEST_TIMEOUT
+            )
             response.raise_for_status()
-            return response.json()
-        except requests.RequestException as e:
+            return orjson.loads(response.content)
+        except (requests.RequestException, orjson.JSONDecodeError) as e:
             logger.error(f"API request failed: {e}")
             return None
 
-    def get_category_members(self):
-        """Fetches the latest members of the configured Wikinews category."""
-        params = {
-            "action": "query", "list": "categorymembers",
-            "cmtitle": f"Category:{self.config['category_name']}",
-            "cmlimit": 50, "cmsort": "timestamp", "cmdir": "desc", "format": "json",
-            "cmprop": "title|timestamp"
-        }
+    def get_category_members(self, added_since=None):
+        """
+        Fetches the latest members of the configured Wikinews category, newest
+        first. With `added_since`, fetches only the members added at or after
+        that timestamp instead, oldest first.
+        """
+        params = {**CATEGORY_MEMBERS_PARAMS, "cmtitle": f"Category:{self.config.category_name}"}
+        if added_since:
+            params.update({"cmstart": added_since, "cmdir": "asc"})
         data = self._make_api_request(params)
         return data.get('query', {}).get('categorymembers', []) if data else []
 
@@ -224,26 +288,34 @@ class WikinewsBot:
           the category that has NOT yet been notified. This is immune to
           removals because membership in notified_titles is permanent.
 
-        - For 'published': keeps the original index-based logic which is
-          safe because published articles are never un-published.
+        - For 'published': once the last checked article's timestamp is known,
+          asks the API only for members added since then. Otherwise keeps the
+          original index-based logic which is safe because published articles
+          are never un-published.
         """
+        msg_type = self.config.message_type
+
+        # ---- Published, with a known last timestamp: ask only for what's newer ----
+        if msg_type == 'published' and self.last_checked_timestamp:
+            return self._articles_added_since_last_check()
+
         all_articles = self.get_category_members()
+        self.category_members = all_articles
         if not all_articles:
-            logger.info(f"[{self.config['category_name']}] No articles found.")
+            logger.info(f"[{self.config.category_name}] No articles found.")
             return []
 
-        msg_type = self.config['message_type']
-
         # ---- Developing / Review: notified-set strategy ----
         if msg_type in ('developing', 'review'):
             # Bootstrap: if the notified set is empty, seed it silently with
             # whatever is currently in the category so we don't spam on first run.
             if not self.notified_titles:
                 logger.info(
-                    f"[{self.config['category_name']}] Empty notified set on first run. "
+                    f"[{self.config.category_name}] Empty notified set on first run. "
                     f"Seeding with {len(all_articles)} current article(s) — no messages sent."
                 )
-                self.notified_titles = {a['title'] for a in all_articles}
+                # Members come newest first; store them oldest first
+                self.notified_titles = dict.fromkeys(a['title'] for a in reversed(all_articles))
                 self.save_notified_titles([a['title'] for a in all_articles])
                 return []
 
@@ -253,7 +325,7 @@ class WikinewsBot:
             new_articles_sorted = new_articles[::-1]
 
             logger.info(
-                f"[{self.config['category_name']}] {len(new_articles_sorted)} new article(s) "
+                f"[{self.config.category_name}] {len(new_articles_sorted)} new article(s) "
                 f"(out of {len(all_articles)} in category, "
                 f"{len(self.notified_titles)} already notified)."
             )
@@ -261,116 +333,164 @@ class WikinewsBot:
 
         # ---- Published: original index-based strategy ----
         # For Review category, if no initial article is set, use the first article found
-        if not self.last_checked_article_title and self.config['category_name'] == 'Review':
+        if not self.last_checked_article_title and self.config.category_name == 'Review':
             if all_articles:
                 self.last_checked_article_title = all_articles[0]['title']
                 logger.info(
-                    f"[{self.config['category_name']}] Setting initial article to: "
+                    f"[{self.config.category_name}] Setting initial article to: "
                     f"{self.last_checked_article_title}"
                 )
                 return []
 
-        try:
-            last_idx = next(
-                i for i, a in enumerate(all_articles)
-                if a['title'] == self.last_checked_article_title
-            )
+        last_idx = next(
+            (i for i, a in enumerate(all_articles)
+             if a['title'] == self.last_checked_article_title),
+            None
+        )
+        if last_idx is not None:
             new_articles = all_articles[:last_idx]
-        except StopIteration:
+        else:
             logger.warning(
-                f"[{self.config['category_name']}] Last checked article not found. Processing latest."
+                f"[{self.config.category_name}] Last checked article not found. Processing latest."
             )
             new_articles = [all_articles[0]] if all_articles else []
 
         return new_articles[::-1]
 
+    def _articles_added_since_last_check(self):
+        """
+        (Published) Returns the articles added to the category after the last
+        checked one, oldest first. The API filters by the saved timestamp, so
+        only the members from that moment on are transferred; cmstart is
+        inclusive, so the last checked article itself comes back and is skipped.
+        """
+        articles = self.get_category_members(added_since=self.last_checked_timestamp)
+        titles = [a['title'] for a in articles]
+
+        if self.last_checked_article_title in titles:
+            # Skip the last checked article and anything added alongside it before it
+            new_articles = articles[titles.index(self.last_checked_article_title) + 1:]
+        else:
+            new_articles = [a for a in articles if a['timestamp'] != self.last_checked_timestamp]
+
+        logger.info(f"[{self.config.category_name}] {len(new_articles)} article(s) added since last check.")
+        return new_articles
+
 
 # ------------------------------------------------------------------
-# Telegram helpers
+# Message preparation
 # ------------------------------------------------------------------
 
-async def broadcast_message(bot, message, targets):
-    """Sends a formatted message to a list of Telegram targets."""
-    for target in targets:
-        try:
-            await bot.send_message(
-                chat_id=target['chat_id'],
-                message_thread_id=target.get('thread_id'),
-                text=message,
-                parse_mode='Markdown',
-                disable_web_page_preview=True
-            )
-            logger.info(f"Successfully sent message to target: {target}")
-        except TelegramError as e:
-            logger.error(f"Failed to send message to {target}: {e}")
+def prepare_message(bot_instance, article_data):
+    """
+    Runs the (blocking) API lookups for one article and builds its message.
+    Returns None if the article should be skipped.
+    """
+    title = article_data['title']
+    url_slug = page_slug(title)
+
+    # For Published category, verify the article has been properly reviewed
+    if bot_instance.config.message_type == 'published':
+        if not bot_instance.formatter.check_article_review_status(title):
+            logger.warning(f"Skipping '{title}' - No valid review found (false detection)")
+            return None
+
+    # Use the appropriate formatter to create the message
+    try:
+        return bot_instance.formatter.format_message(article_data, url_slug)
+    except Exception as e:
+        logger.error(f"Error formatting message for '{title}': {e}")
+        return None
+
+
+async def prepare_messages(bot_instance, articles):
+    """
+    Prepares the messages for all articles concurrently. The API calls are
+    I/O-bound, so running them in worker threads overlaps their latency.
+    Results are returned in the same order as `articles`.
+    """
+    # Anything the formatter can look up for all articles in one go comes first
+    await asyncio.to_thread(bot_instance.formatter.prefetch, [a['title'] for a in articles])
+
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_FETCHES)
+
+    async def prepare(article_data):
+        async with semaphore:
+            return await asyncio.to_thread(prepare_message, bot_instance, article_data)
+
+    return await asyncio.gather(*(prepare(a) for a in articles))
 
 
 # ------------------------------------------------------------------
 # Main
 # ------------------------------------------------------------------
 
-async def main_async():
-    """Main function to run the bot check for all configured categories."""
-    if not config.BOT_TOKEN:
-        logger.error("Telegram bot token is not configured.")
-        sys.exit(1)
+async def process_category(telegram_bot, category_config):
+    """Checks one category for new articles and broadcasts their messages in order."""
+    logger.info(f"--- Checking category: {category_config.category_name} ---")
+    bot_instance = WikinewsBot(category_config)
+    new_articles = await asyncio.to_thread(bot_instance.check_for_new_articles)
+
+    if not new_articles:
+        logger.info(f"No new articles for '{category_config.category_name}'.")
+        return
 
-    telegram_bot = Bot(token=config.BOT_TOKEN)
+    logger.info(
+        f"Found {len(new_articles)} new article(s) for '{category_config.category_name}'."
+    )
 
-    for category_config in config.MONITORED_CATEGORIES:
-        logger.info(f"--- Checking category: {category_config['category_name']} ---")
-        bot_instance = WikinewsBot(category_config)
-        new_articles = bot_instance.check_for_new_articles()
+    if category_config.message_type in ('developing', 'review'):
+        # Pass the category titles fetched for this check so pruning knows
+        # what's still active
+        current_titles = [a['title'] for a in bot_instance.category_members]
 
-        if not new_articles:
-            logger.info(f"No new articles for '{category_config['category_name']}'.")
+    # Fetch and format everything up front, then send in chronological order
+    messages = await prepare_messages(bot_instance, new_articles)
+
+    for article_data, message in zip(new_articles, messages):
+        if message is None:
             continue
 
-        logger.info(
-            f"Found {len(new_articles)} new article(s) for '{category_config['category_name']}'."
-        )
+        title = article_data['title']
+        logger.info(f"Final message for '{title}':\n{message}")
+        await broadcast_message(telegram_bot, message, category_config.telegram_targets)
 
-        # Track which articles were successfully notified this run
-        notified_this_run = []
-        latest_article_data = None   # used only by 'published'
-
-        for article_data in new_articles:
-            title = article_data['title']
-            url_slug = title.replace(' ', '_')
-
-            # For Published category, verify the article has been properly reviewed
-            if category_config['message_type'] == 'published':
-                if not bot_instance.formatter.check_article_review_status(title):
-                    logger.warning(f"Skipping '{title}' - No valid review found (false detection)")
-                    continue
-
-            # Use the appropriate formatter to create the message
-            try:
-                message = bot_instance.formatter.format_message(article_data, url_slug)
-                logger.info(f"Final message for '{title}':\n{message}")
-                await broadcast_message(telegram_bot, message, category_config['telegram_targets'])
-
-                if category_config['message_type'] in ('developing', 'review'):
-                    # Mark as notified immediately so even a mid-run crash
-                    # won't re-send messages for articles already broadcast.
-                    bot_instance.notified_titles.add(title)
-                    notified_this_run.append(title)
-                else:
-                    latest_article_data = article_data
-
-            except Exception as e:
-                logger.error(f"Error formatting message for '{title}': {e}")
-                continue
-
-        # Persist state after processing all articles in this category
-        if category_config['message_type'] in ('developing', 'review'):
-            if notified_this_run:
-                # Pass current live category titles so pruning knows what's still active
-                current_titles = [a['title'] for a in bot_instance.get_category_members()]
-                bot_instance.save_notified_titles(current_titles)
+        # Persist state after every broadcast. The workflow commits the state
+        # files even when the run fails, so an error later in this category
+        # won't make the next run re-send what has already gone out.
+        if category_config.message_type in ('developing', 'review'):
+            bot_instance.notified_titles[title] = None
+            bot_instance.save_notified_titles(current_titles)
         else:
-            if latest_article_data:
-                bot_instance.save_last_checked_article(latest_article_data)
+            bot_instance.save_last_checked_article(article_data)
+
+
+async def main_async():
+    """Main function to run the bot check for all configured categories."""
+    if not config.BOT_TOKEN:
+        logger.error("Telegram bot token is not configured.")
+        sys.exit(1)
+
+    telegram_bot = Bot(
+        token=config.BOT_TOKEN,
+        request=HTTPXRequest(connection_pool_size=TELEGRAM_CONNECTION_POOL_SIZE)
+    )
+
+    # Categories are independent (own state file, own targets), so they are
+    # checked concurrently. A failing category doesn't cancel the others
+    # mid-broadcast; its error is re-raised once they have all finished, and
+    # the workflow still commits the state files the others have saved.
+    results = await asyncio.gather(
+        *(process_category(telegram_bot, c) for c in config.MONITORED_CATEGORIES),
+        return_exceptions=True
+    )
+    errors = []
+    for category_config, result in zip(config.MONITORED_CATEGORIES, results):
+        if isinstance(result, Exception):
+            logger.error(f"[{category_config.category_name}] Category check failed: {result}")
+            errors.append(result)
+    if errors:
+        raise errors[0]
 
 
 if __name__ == '__main__':